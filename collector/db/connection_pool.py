@@ -0,0 +1,78 @@
+import contextlib
+import queue
+import sqlite3 as database
+from pathlib import Path
+from sqlite3 import Connection
+
+
+class ConnectionPool:
+    """
+    Keep up to size idle connections to one database file and hand them out again,
+    new connections are opened lazily only when all the idle ones are in use.
+    """
+
+    # Applied on every new connection, synchronous NORMAL avoids fsync on every commit in WAL journal mode.
+    CONNECTION_PRAGMAS = (
+        "PRAGMA synchronous = NORMAL;"
+        "PRAGMA cache_size = -20000;"
+        "PRAGMA temp_store = MEMORY;"
+        "PRAGMA mmap_size = 268435456;"
+    )
+
+    def __init__(self, database_file: Path, size: int = 4, journal_mode: str = "WAL"):
+        self.database_file = database_file
+        self.journal_mode = journal_mode
+        self._idle_connections = queue.Queue(maxsize=size)
+
+    def _create_connection(self) -> Connection:
+        # Autocommit mode, write transactions are opened explicitly by Database._transaction.
+        # The connections are reused, so keep more prepared statements than the default 128.
+        connection = database.connect(self.database_file, check_same_thread=False, isolation_level=None,
+                                      cached_statements=256)
+        connection.executescript(f"PRAGMA journal_mode = {self.journal_mode};{ConnectionPool.CONNECTION_PRAGMAS}")
+        return connection
+
+    @staticmethod
+    def _is_alive(connection: Connection) -> bool:
+        try:
+            connection.execute("SELECT 1;")
+            return True
+        except database.Error:
+            return False
+
+    def _get_connection(self, is_file_checked: bool) -> Connection:
+        if not is_file_checked and not self._idle_connections.empty() and not self.database_file.exists():
+            # The file was deleted or replaced, the idle connections point to the old one.
+            self.close()
+        while True:
+            try:
+                connection = self._idle_connections.get_nowait()
+            except queue.Empty:
+                return self._create_connection()
+            if self._is_alive(connection):
+                return connection
+            connection.close()
+
+    @contextlib.contextmanager
+    def acquire(self, is_file_checked: bool = False) -> Connection:
+        """
+        :param is_file_checked: the caller just checked that the database file exists, so skip checking it again.
+        """
+        connection = self._get_connection(is_file_checked)
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            try:
+                self._idle_connections.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle_connections.get_nowait().close()
+            except queue.Empty:
+                return
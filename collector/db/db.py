@@ -1,14 +1,17 @@
+import copy
+import functools
 import json
 import re
+import threading
 from pathlib import Path
 import shutil
 import contextlib
-import sqlite3 as database
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from sqlite3 import OperationalError, Connection, Cursor
 from typing import List, Optional, Dict, Tuple, Collection, Set
 
 import utils
+from collector.db.connection_pool import ConnectionPool
 from data.academic_activity import AcademicActivity
 from data.activity import Activity
 from data.course import Course
@@ -25,23 +28,123 @@ from data.user import User
 EnglishName = str
 HebrewName = str
 
+# Plain dict lookups for the enum names stored in the database, cheaper than Enum[name] for every row.
+SEMESTERS_BY_NAME: Dict[str, Semester] = {semester.name: semester for semester in Semester}
+DEGREES_BY_NAME: Dict[str, Degree] = {degree.name: degree for degree in Degree}
+
+
+def academic_activity_row_factory(unused_cursor: Cursor, row: tuple) -> AcademicActivity:
+    # The last two columns of activities are the campus id and the language value.
+    return AcademicActivity(*row[:-2])
+
+
+def meeting_row_factory(unused_cursor: Cursor, row: tuple) -> Tuple[str, Meeting]:
+    activity_id, day, start_time, end_time, _language_value = row
+    return activity_id, Meeting(day, start_time, end_time)
+
+
+def cache_shared_result(method):
+    """
+    Cache the result of a Database method that reads only from the shared database.
+    The cache is shared between all the instances and cleared on every write to a database and whenever
+    the connections are closed before a database file is replaced or deleted.
+    The result must be a container of immutable values, the callers get a shallow copy of it
+    so changing the container doesn't change the cache.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (self.shared_database_path, method.__name__, *args)
+        with Database.results_cache_lock:
+            if key in Database.results_cache:
+                Database.results_cache.move_to_end(key)
+                return copy.copy(Database.results_cache[key])
+        result = method(self, *args)
+        with Database.results_cache_lock:
+            Database.results_cache[key] = copy.copy(result)
+            if len(Database.results_cache) > Database.RESULTS_CACHE_SIZE:
+                Database.results_cache.popitem(last=False)
+        return result
+    return wrapper
+
 
 class Database:
 
+    # Shared between all the instances, so replacing a database file can close every connection to it.
+    # Keyed by the resolved path and by every path the pool was requested with, to resolve only once per path.
+    _connection_pools: Dict[Path, ConnectionPool] = {}
+    _connection_pools_lock = threading.Lock()
+
+    RESULTS_CACHE_SIZE = 64
+    STAGING_ACTIVITIES_THRESHOLD = 1000
+    results_cache: OrderedDict = OrderedDict()
+    results_cache_lock = threading.Lock()
+    # The campus ids by their english and hebrew names for every shared database, guarded by results_cache_lock.
+    _campus_ids_cache: Dict[Path, Dict[str, int]] = {}
+
     @contextlib.contextmanager
-    def connect(self, database_file: Path) -> Tuple[Connection, Cursor]:
-        connection = None
-        cursor = None
-        try:
-            connection = database.connect(database_file)
+    def connect(self, database_file: Path, is_file_checked: bool = False) -> Tuple[Connection, Cursor]:
+        with self._get_connection_pool(database_file).acquire(is_file_checked) as connection:
             cursor = connection.cursor()
-            yield connection, cursor
+            try:
+                yield connection, cursor
+                connection.commit()
+            finally:
+                cursor.close()
+
+    def _get_connection_pool(self, database_file: Path) -> ConnectionPool:
+        connection_pool = Database._connection_pools.get(database_file)
+        if connection_pool is not None:
+            return connection_pool
+        resolved_database_file = Path(database_file).resolve()
+        with Database._connection_pools_lock:
+            if resolved_database_file not in Database._connection_pools:
+                # The journal mode is stored in the file, the shared database is published so it keeps
+                # the default rollback journal and doesn't need -wal and -shm files next to it.
+                is_shared_database = resolved_database_file == Path(self.shared_database_path).resolve()
+                journal_mode = "DELETE" if is_shared_database else "WAL"
+                Database._connection_pools[resolved_database_file] = ConnectionPool(resolved_database_file,
+                                                                                     journal_mode=journal_mode)
+            connection_pool = Database._connection_pools[resolved_database_file]
+            Database._connection_pools[database_file] = connection_pool
+            return connection_pool
+
+    @staticmethod
+    def clear_results_cache():
+        with Database.results_cache_lock:
+            Database.results_cache.clear()
+            Database._campus_ids_cache.clear()
+
+    def close_connections(self, database_file: Optional[Path] = None):
+        """
+        Close the idle pooled connections to database_file, or to all the files if it is not given.
+        Must be called before a database file is replaced or deleted, open files can't be deleted on Windows.
+        """
+        Database.clear_results_cache()
+        with Database._connection_pools_lock:
+            if database_file is None:
+                connection_pools = set(Database._connection_pools.values())
+            else:
+                connection_pool = Database._connection_pools.get(database_file) or \
+                    Database._connection_pools.get(Path(database_file).resolve())
+                connection_pools = [connection_pool] if connection_pool else []
+            for connection_pool in connection_pools:
+                connection_pool.close()
+
+    @contextlib.contextmanager
+    def _transaction(self, connection: Connection):
+        """
+        Run the enclosed statements in one explicit write transaction.
+        Rollback the whole transaction if any of the statements failed.
+        """
+        connection.execute("BEGIN IMMEDIATE;")
+        try:
+            yield
             connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
         finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+            self.clear_results_cache()
 
     def __init__(self, database_id: Optional[str] = None):
         self.logger = utils.get_logging()
@@ -80,171 +183,234 @@ class Database:
     def init_personal_database_tables(self):
         self.personal_database_path.parent.mkdir(parents=True, exist_ok=True)
         with self.connect(self.personal_database_path) as (unused_connection, cursor):
-            cursor.execute("CREATE TABLE IF NOT EXISTS personal_activities "
-                           "(id INTEGER PRIMARY KEY, name TEXT UNIQUE);")
+            cursor.executescript(
+                "CREATE TABLE IF NOT EXISTS personal_activities "
+                "(id INTEGER PRIMARY KEY, name TEXT UNIQUE);"
 
-            cursor.execute("CREATE TABLE IF NOT EXISTS personal_meetings "
-                           "(activity_id INTEGER, day INTEGER, start_time TEXT, end_time TEXT, "
-                           "PRIMARY KEY (activity_id, day, start_time, end_time));")
+                "CREATE TABLE IF NOT EXISTS personal_meetings "
+                "(activity_id INTEGER, day INTEGER, start_time TEXT, end_time TEXT, "
+                "PRIMARY KEY (activity_id, day, start_time, end_time));"
 
-            cursor.execute("CREATE TABLE IF NOT EXISTS activities_can_enroll_in "
-                           "(activity_id TEXT PRIMARY KEY);")
+                "CREATE TABLE IF NOT EXISTS activities_can_enroll_in "
+                "(activity_id TEXT PRIMARY KEY);"
 
-            cursor.execute("CREATE TABLE IF NOT EXISTS courses_already_done "
-                           "(parent_course_number INTEGER PRIMARY KEY);")
+                "CREATE TABLE IF NOT EXISTS courses_already_done "
+                "(parent_course_number INTEGER PRIMARY KEY);"
 
-            cursor.execute("CREATE TABLE IF NOT EXISTS activities_tracks "
-                           "(activity_id TEXT, track INTEGER, "
-                           "PRIMARY KEY (activity_id, track));")
+                "CREATE TABLE IF NOT EXISTS activities_tracks "
+                "(activity_id TEXT, track INTEGER, "
+                "PRIMARY KEY (activity_id, track));"
+            )
 
     def init_shared_database_tables(self):
+        self.clear_results_cache()
         self.shared_database_path.parent.mkdir(parents=True, exist_ok=True)
         with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            cursor.execute("CREATE TABLE IF NOT EXISTS campuses "
-                           "(id INTEGER PRIMARY KEY, english_name TEXT, hebrew_name TEXT);")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS semesters (id INTEGER PRIMARY KEY, name TEXT UNIQUE);")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS semesters_courses "
-                           "(semester_id INTEGER, course_id INTEGER, "
-                           "FOREIGN KEY(course_id) REFERENCES courses(parent_course_number), "
-                           "FOREIGN KEY(semester_id) REFERENCES semesters(id));")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS courses "
-                           "(name TEXT, course_number INTEGER, "
-                           "parent_course_number INTEGER, language_value CHARACTER(2), "
-                           "is_active BOOLEAN, credits REAL, "
-                           "PRIMARY KEY(parent_course_number, language_value));")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS meetings "
-                           "(activity_id TEXT, day INTEGER, start_time TEXT, end_time TEXT, "
-                           "language_value CHARACTER(2), "
-                           "FOREIGN KEY(activity_id) REFERENCES activities(id), "
-                           "PRIMARY KEY(activity_id, day, start_time, end_time, language_value));")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS activities "
-                           "(name TEXT, activity_type INTEGER, attendance_required BOOLEAN, lecturer_name TEXT, "
-                           "course_number INTEGER, parent_course_number INTEGER, location TEXT, "
-                           "activity_id TEXT, description TEXT, current_capacity INTEGER, "
-                           "max_capacity INTEGER, actual_course_number INTEGER, campus_id INTEGER, "
-                           "language_value CHARACTER(2),"
-                           "FOREIGN KEY(campus_id) REFERENCES campuses(id), "
-                           "FOREIGN KEY(lecturer_name) REFERENCES lecturers(name),"
-                           "PRIMARY KEY(activity_id, campus_id, language_value));")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS lecturers "
-                           "(name TEXT PRIMARY KEY);")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS courses_lecturers "
-                           "(course_number INTEGER, parent_course_number INTEGER, lecturer_name TEXT, "
-                           "is_lecture_rule BOOLEAN, campus_id INTEGER, language_value CHARACTER(2), "
-                           "FOREIGN KEY(lecturer_name) REFERENCES lecturers(name), "
-                           "FOREIGN KEY(campus_id) REFERENCES campuses(id), "
-                           "PRIMARY KEY(course_number, parent_course_number, lecturer_name, "
-                           "is_lecture_rule, campus_id, lecturer_name));")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS degrees "
-                           "(name TEXT PRIMARY KEY, department INTEGER);")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS degrees_courses "
-                           "(degree_name TEXT, parent_course_number INTEGER, "
-                           "FOREIGN KEY(degree_name) REFERENCES degrees(name), "
-                           "PRIMARY KEY(degree_name, parent_course_number));")
-
-            cursor.execute("CREATE TABLE IF NOT EXISTS mandatory_courses "
-                           "(degree_name TEXT, parent_course_number INTEGER, "
-                           "FOREIGN KEY(degree_name) REFERENCES degrees(name), "
-                           "PRIMARY KEY(degree_name, parent_course_number));")
+            cursor.executescript(
+                "CREATE TABLE IF NOT EXISTS campuses "
+                "(id INTEGER PRIMARY KEY, english_name TEXT, hebrew_name TEXT);"
+
+                "CREATE TABLE IF NOT EXISTS semesters (id INTEGER PRIMARY KEY, name TEXT UNIQUE);"
+
+                "CREATE TABLE IF NOT EXISTS semesters_courses "
+                "(semester_id INTEGER, course_id INTEGER, "
+                "FOREIGN KEY(course_id) REFERENCES courses(parent_course_number), "
+                "FOREIGN KEY(semester_id) REFERENCES semesters(id));"
+
+                "CREATE TABLE IF NOT EXISTS courses "
+                "(name TEXT, course_number INTEGER, "
+                "parent_course_number INTEGER, language_value CHARACTER(2), "
+                "is_active BOOLEAN, credits REAL, "
+                "PRIMARY KEY(parent_course_number, language_value));"
+
+                "CREATE TABLE IF NOT EXISTS meetings "
+                "(activity_id TEXT, day INTEGER, start_time TEXT, end_time TEXT, "
+                "language_value CHARACTER(2), "
+                "FOREIGN KEY(activity_id) REFERENCES activities(id), "
+                "PRIMARY KEY(activity_id, day, start_time, end_time, language_value));"
+
+                "CREATE TABLE IF NOT EXISTS activities "
+                "(name TEXT, activity_type INTEGER, attendance_required BOOLEAN, lecturer_name TEXT, "
+                "course_number INTEGER, parent_course_number INTEGER, location TEXT, "
+                "activity_id TEXT, description TEXT, current_capacity INTEGER, "
+                "max_capacity INTEGER, actual_course_number INTEGER, campus_id INTEGER, "
+                "language_value CHARACTER(2),"
+                "FOREIGN KEY(campus_id) REFERENCES campuses(id), "
+                "FOREIGN KEY(lecturer_name) REFERENCES lecturers(name),"
+                "PRIMARY KEY(activity_id, campus_id, language_value));"
+
+                "CREATE TABLE IF NOT EXISTS lecturers "
+                "(name TEXT PRIMARY KEY);"
+
+                "CREATE TABLE IF NOT EXISTS courses_lecturers "
+                "(course_number INTEGER, parent_course_number INTEGER, lecturer_name TEXT, "
+                "is_lecture_rule BOOLEAN, campus_id INTEGER, language_value CHARACTER(2), "
+                "FOREIGN KEY(lecturer_name) REFERENCES lecturers(name), "
+                "FOREIGN KEY(campus_id) REFERENCES campuses(id), "
+                "PRIMARY KEY(course_number, parent_course_number, lecturer_name, "
+                "is_lecture_rule, campus_id, lecturer_name));"
+
+                "CREATE TABLE IF NOT EXISTS degrees "
+                "(name TEXT PRIMARY KEY, department INTEGER);"
+
+                "CREATE TABLE IF NOT EXISTS degrees_courses "
+                "(degree_name TEXT, parent_course_number INTEGER, "
+                "FOREIGN KEY(degree_name) REFERENCES degrees(name), "
+                "PRIMARY KEY(degree_name, parent_course_number));"
+
+                "CREATE TABLE IF NOT EXISTS mandatory_courses "
+                "(degree_name TEXT, parent_course_number INTEGER, "
+                "FOREIGN KEY(degree_name) REFERENCES degrees(name), "
+                "PRIMARY KEY(degree_name, parent_course_number));"
+
+                # Indexes for the filters and joins of the load methods that the primary keys don't cover.
+                "CREATE INDEX IF NOT EXISTS activities_campus_language_parent_course_index "
+                "ON activities(campus_id, language_value, parent_course_number);"
+
+                "CREATE INDEX IF NOT EXISTS activities_campus_language_name_index "
+                "ON activities(campus_id, language_value, name);"
+
+                "CREATE INDEX IF NOT EXISTS semesters_courses_course_index "
+                "ON semesters_courses(course_id);"
+
+                "CREATE INDEX IF NOT EXISTS degrees_courses_parent_course_index "
+                "ON degrees_courses(parent_course_number);"
+            )
 
     def init_database_tables(self):
         self.init_shared_database_tables()
         self.init_personal_database_tables()
 
     def clear_activities_ids_tracks_can_enroll(self):
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
-            cursor.execute("DELETE FROM activities_can_enroll_in;")
-            cursor.execute("DELETE FROM activities_tracks;")
+        with self.connect(self.personal_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.execute("DELETE FROM activities_can_enroll_in;")
+                cursor.execute("DELETE FROM activities_tracks;")
 
     def load_degrees_courses(self) -> Dict[int, Set[Degree]]:
         degrees_courses = defaultdict(set)
         with self.connect(self.shared_database_path) as (unused_connection, cursor):
             cursor.execute("SELECT * FROM degrees_courses;")
-            for degree_name, course_number in cursor.fetchall():
-                degrees_courses[course_number].add(Degree[degree_name])
+            for degree_name, course_number in cursor:
+                degrees_courses[course_number].add(DEGREES_BY_NAME[degree_name])
         return degrees_courses
 
     def load_campus_id(self, campus_name: str):
+        with Database.results_cache_lock:
+            campus_ids = Database._campus_ids_cache.setdefault(self.shared_database_path, {})
+            if campus_name in campus_ids:
+                return campus_ids[campus_name]
         with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            cursor.execute("SELECT id FROM campuses WHERE english_name = ? or hebrew_name = ?;",
-                           (campus_name, campus_name))
-            campus_id = cursor.fetchone()[0]
-            return campus_id
+            cursor.execute("SELECT id, english_name, hebrew_name FROM campuses "
+                           "WHERE english_name = ? or hebrew_name = ?;", (campus_name, campus_name))
+            campus_id, english_name, hebrew_name = cursor.fetchone()
+        with Database.results_cache_lock:
+            campus_ids[english_name] = campus_id
+            campus_ids[hebrew_name] = campus_id
+        return campus_id
+
+    @staticmethod
+    def _scalar_rows(cursor: Cursor) -> list:
+        """
+        :return: the first column of all the rows left in the cursor.
+        """
+        row_factory = cursor.row_factory
+        cursor.row_factory = lambda unused_cursor, row: row[0]
+        values = list(cursor)
+        cursor.row_factory = row_factory
+        return values
+
+    @staticmethod
+    def _load_meetings(cursor: Cursor, activities_ids: Collection[str],
+                       language: Language) -> Dict[str, List[Meeting]]:
+        """
+        Load the meetings of all the given activities in one query.
+        :return: dict of activity id to its meetings, activities without meetings are not in the dict.
+        """
+        activities_ids_text = f"({', '.join(['?'] * len(activities_ids))})"
+        row_factory = cursor.row_factory
+        cursor.row_factory = meeting_row_factory
+        cursor.execute("SELECT * FROM meetings "
+                       f"WHERE language_value = ? AND activity_id IN {activities_ids_text};",
+                       (language.short_name(), *activities_ids))
+        meetings = defaultdict(list)
+        for activity_id, meeting in cursor:
+            meetings[activity_id].append(meeting)
+        cursor.row_factory = row_factory
+        return meetings
 
     def save_semesters(self, semesters: List[Semester]):
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            for semester in semesters:
-                cursor.execute("INSERT OR IGNORE INTO semesters VALUES (?, ?);", (*semester, ))
+        with self.connect(self.shared_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.executemany("INSERT OR IGNORE INTO semesters VALUES (?, ?);",
+                                   [(*semester, ) for semester in semesters])
 
     def save_activities_ids_groups_can_enroll_in(self, activities_can_enroll_in: Dict[str, Set[int]]):
-        self.clear_activities_ids_tracks_can_enroll()
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
-            for activity_id, tracks in activities_can_enroll_in.items():
-                cursor.execute("INSERT INTO activities_can_enroll_in VALUES (?);", (activity_id, ))
-                for track in tracks:
-                    cursor.execute("INSERT INTO activities_tracks VALUES (?, ?);", (activity_id, track))
+        with self.connect(self.personal_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.execute("DELETE FROM activities_can_enroll_in;")
+                cursor.execute("DELETE FROM activities_tracks;")
+                cursor.executemany("INSERT INTO activities_can_enroll_in VALUES (?);",
+                                   [(activity_id, ) for activity_id in activities_can_enroll_in])
+                cursor.executemany("INSERT INTO activities_tracks VALUES (?, ?);",
+                                   [(activity_id, track) for activity_id, tracks in activities_can_enroll_in.items()
+                                    for track in tracks])
 
     def load_activities_ids_groups_can_enroll_in(self) -> Dict[str, Set[str]]:
         if not self.personal_database_path.exists():
             return {}
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
+        with self.connect(self.personal_database_path, is_file_checked=True) as (unused_connection, cursor):
             cursor.execute("SELECT activity_id FROM activities_can_enroll_in;")
-            activities_can_enroll_in = {activity_id: set() for (activity_id,) in cursor.fetchall()}
-            for activity_id, tracks in activities_can_enroll_in.items():
-                cursor.execute("SELECT track FROM activities_tracks WHERE activity_id = ?;", (activity_id, ))
-                tracks.update(track for (track,) in cursor.fetchall())
+            activities_can_enroll_in = {activity_id: set() for activity_id in self._scalar_rows(cursor)}
+            cursor.execute("SELECT activity_id, track FROM activities_tracks;")
+            for activity_id, track in cursor:
+                if activity_id in activities_can_enroll_in:
+                    activities_can_enroll_in[activity_id].add(track)
             return activities_can_enroll_in
 
     def save_degrees(self, degrees: List[Degree]):
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            for degree in degrees:
-                cursor.execute("INSERT OR IGNORE INTO degrees VALUES (?, ?);", (*degree, ))
+        with self.connect(self.shared_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.executemany("INSERT OR IGNORE INTO degrees VALUES (?, ?);",
+                                   [(*degree, ) for degree in degrees])
 
+    @cache_shared_result
     def load_degrees(self) -> List[Degree]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             try:
                 cursor.execute("SELECT * FROM degrees;")
             except OperationalError:
                 return []
-            degrees_values = cursor.fetchall()
             degrees = set()
-            for name, department in degrees_values:
-                degree = Degree[name]
+            for name, department in cursor:
+                degree = DEGREES_BY_NAME[name]
                 if degree.value.department != department:
                     raise ValueError("Degree department in database is different from the one in the code")
                 degrees.add(degree)
         return list(degrees)
 
+    @cache_shared_result
     def load_semesters(self) -> List[Semester]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             try:
                 cursor.execute("SELECT name FROM semesters;")
             except OperationalError:
                 return []
-            semesters = [Semester[semester_name.upper()] for (semester_name,) in cursor.fetchall()]
+            semesters = [SEMESTERS_BY_NAME[semester_name.upper()] for semester_name in self._scalar_rows(cursor)]
         return semesters
 
     def save_personal_activities(self, activities: List[Activity]):
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
-            for activity in activities:
-                cursor.execute("INSERT INTO personal_activities VALUES (?, ?);",
-                               (activity.activity_id, activity.name))
-                for meeting in activity.meetings:
-                    cursor.execute("INSERT OR IGNORE INTO personal_meetings VALUES (?, ?, ?, ?);",
-                                   (activity.activity_id, *meeting, ))
+        with self.connect(self.personal_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.executemany("INSERT INTO personal_activities VALUES (?, ?);",
+                                   [(activity.activity_id, activity.name) for activity in activities])
+                cursor.executemany("INSERT OR IGNORE INTO personal_meetings VALUES (?, ?, ?, ?);",
+                                   [(activity.activity_id, *meeting, ) for activity in activities
+                                    for meeting in activity.meetings])
 
     def load_courses_choices(self, campus_name: str,
                              language: Language,
@@ -262,75 +428,102 @@ class Database:
         assert degrees
         groups = self.english_groups if settings and not settings.show_english_speaker_courses else [".*"]
         regex_filter_group = re.compile(rf"^\d+\.({'|'.join(groups)})\..*$")
-        courses = courses or self.load_active_courses(campus_name, language)
-        courses_choices_data = defaultdict(lambda: (set(), set()))
+        if not self.shared_database_path.exists():
+            return {}
         courses_choices = {}
-        lecture_index = 0
-        practice_index = 1
-        parent_ids = {}
-
-        activities = self.load_academic_activities(campus_name, language, courses, activities_ids)
-
-        for activity in activities:
-            if settings and not settings.show_english_speaker_courses:
-                if regex_filter_group.search(activity.activity_id):
-                    continue
-            index = lecture_index if activity.type.is_lecture() else practice_index
-            courses_choices_data[activity.name][index].add(activity.lecturer_name)
-            parent_ids[activity.name] = activity.parent_course_number
-
-        for activity_name, (lectures, practices) in courses_choices_data.items():
-            course_choice = CourseChoice(
-                activity_name,
-                parent_ids[activity_name],
-                lectures,
-                practices
-            )
-            courses_choices[activity_name] = course_choice
+        filter_english_groups = settings and not settings.show_english_speaker_courses
+        lecture_types = {Type.LECTURE, Type.SEMINAR}
+        campus_id = self.load_campus_id(campus_name)
+        if courses:
+            courses_parent_numbers_text = f"({', '.join(['?'] * len(courses))})"
+            courses_parameters = [course.parent_course_number for course in courses]
+        else:
+            # The same courses load_active_courses returns, as a sub query instead of another round trip.
+            # The degrees_courses check is deliberately not linked to the course, it mirrors load_active_courses
+            # which joins degrees_courses without a course condition, so it only requires that a default degree
+            # has any course at all.
+            default_degrees = Degree.get_defaults()
+            courses_parent_numbers_text = "(SELECT courses.parent_course_number FROM courses " \
+                                          "WHERE courses.language_value = ? AND EXISTS (SELECT 1 FROM activities " \
+                                          "WHERE activities.parent_course_number = courses.parent_course_number " \
+                                          "AND activities.course_number = courses.course_number " \
+                                          "AND activities.language_value = courses.language_value " \
+                                          "AND activities.campus_id = ?) " \
+                                          "AND EXISTS (SELECT 1 FROM degrees_courses WHERE degree_name IN " \
+                                          f"({', '.join(['?'] * len(default_degrees))})))"
+            courses_parameters = [language.short_name(), campus_id, *[degree.name for degree in default_degrees]]
+        activities_ids_text = f"activity_id IN ({', '.join(['?'] * len(activities_ids))})" \
+            if activities_ids else "1"
+
+        # Only the columns needed for the choices, without loading the meetings of every activity
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
+            cursor.execute("SELECT name, activity_type, lecturer_name, parent_course_number, activity_id "
+                           "FROM activities "
+                           "WHERE campus_id = ? AND language_value = ? AND "
+                           f"parent_course_number IN {courses_parent_numbers_text} "
+                           f"AND {activities_ids_text};",
+                           (campus_id, language.short_name(), *courses_parameters, *activities_ids))
+            activities_data = cursor.fetchall()
+
+        for name, activity_type, lecturer_name, parent_course_number, activity_id in activities_data:
+            if filter_english_groups and regex_filter_group.search(activity_id):
+                continue
+            course_choice = courses_choices.get(name)
+            if course_choice is None:
+                course_choice = CourseChoice(name, parent_course_number, set(), set())
+                courses_choices[name] = course_choice
+            if activity_type in lecture_types:
+                course_choice.available_teachers_for_lecture.add(lecturer_name)
+            else:
+                course_choice.available_teachers_for_practice.add(lecturer_name)
         return courses_choices
 
     def load_personal_activities(self) -> List[Activity]:
         if not self.personal_database_path.exists():
             return []
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
+        with self.connect(self.personal_database_path, is_file_checked=True) as (unused_connection, cursor):
             cursor.execute("SELECT id, name FROM personal_activities;")
             activities = [Activity.create_personal_from_database(activity_id, activity_name)
-                          for activity_id, activity_name in cursor.fetchall()]
+                          for activity_id, activity_name in cursor]
+
+            cursor.execute("SELECT * FROM personal_meetings;")
+            meetings = defaultdict(list)
+            for activity_id, *data_line in cursor:
+                meetings[activity_id].append(Meeting(*data_line))
 
             for activity in activities:
-                cursor.execute("SELECT * FROM personal_meetings "
-                               "WHERE activity_id = ?;", (activity.activity_id, ))
-                meetings = [Meeting(*data_line) for _activity_id, *data_line in cursor.fetchall()]
-                activity.meetings = meetings
+                activity.meetings = meetings.get(activity.activity_id, [])
             return activities
 
     def save_courses(self, courses: List[Course], language: Language):
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            for course in courses:
-                cursor.execute("INSERT OR IGNORE INTO courses VALUES (?, ?, ?, ?, ?, ?);",
-                               (*course, language.short_name(), course.is_active, course.credits_count))
-                for semester in course.semesters:
-                    cursor.execute("INSERT OR IGNORE INTO semesters_courses VALUES (?, ?);",
-                                   (semester.value, course.parent_course_number))
-                for degree in course.degrees:
-                    cursor.execute("INSERT OR IGNORE INTO degrees_courses VALUES (?, ?);",
-                                   (degree.name, course.parent_course_number))
-                for degree in course.mandatory_degrees:
-                    cursor.execute("INSERT OR IGNORE INTO mandatory_courses VALUES (?, ?);",
-                                   (degree.name, course.parent_course_number))
-
+        with self.connect(self.shared_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.executemany("INSERT OR IGNORE INTO courses VALUES (?, ?, ?, ?, ?, ?);",
+                                   [(*course, language.short_name(), course.is_active, course.credits_count)
+                                    for course in courses])
+                cursor.executemany("INSERT OR IGNORE INTO semesters_courses VALUES (?, ?);",
+                                   [(semester.value, course.parent_course_number) for course in courses
+                                    for semester in course.semesters])
+                cursor.executemany("INSERT OR IGNORE INTO degrees_courses VALUES (?, ?);",
+                                   [(degree.name, course.parent_course_number) for course in courses
+                                    for degree in course.degrees])
+                cursor.executemany("INSERT OR IGNORE INTO mandatory_courses VALUES (?, ?);",
+                                   [(degree.name, course.parent_course_number) for course in courses
+                                    for degree in course.mandatory_degrees])
+
+    @cache_shared_result
     def load_courses_active_numbers(self) -> Set[str]:
         if not self.shared_database_path.exists():
             return set()
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             cursor.execute("SELECT DISTINCT course_number from activities;")
-            return {course_number for course_number, *rest in cursor.fetchall()}
+            return set(self._scalar_rows(cursor))
 
     def load_courses(self, language: Language, degrees: Optional[Set[Degree]] = None) -> List[Course]:
         if not self.shared_database_path.exists():
             return []
         courses_numbers_active = self.load_courses_active_numbers()
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             degrees = degrees or Degree.get_defaults()
             degrees_text = f"({', '.join(['?'] * len(degrees))})"
             cursor.execute("SELECT courses.* "
@@ -343,28 +536,32 @@ class Database:
             courses = {Course(name, course_number, parent_course_number,
                               is_active=bool(is_active), credits_count=credits_count)
                        for name, course_number, parent_course_number, unused_langauge, is_active, credits_count
-                       in cursor.fetchall()}
-            for course in courses:
-                cursor.execute("SELECT name FROM semesters "
-                               "INNER JOIN semesters_courses "
-                               "INNER JOIN degrees_courses "
-                               "ON semesters.id = semesters_courses.semester_id "
-                               "AND semesters_courses.course_id = degrees_courses.parent_course_number "
-                               "WHERE semesters_courses.course_id = ?"
-                               f"AND degrees_courses.degree_name in {degrees_text};",
-                               (course.parent_course_number, *[degree.name for degree in degrees]))
-                course.semesters = {Semester[semester_name.upper()] for (semester_name,) in cursor.fetchall()}
-            for course in courses:
-                cursor.execute("SELECT degree_name FROM degrees_courses "
-                               "WHERE parent_course_number = ?;",
-                               (course.parent_course_number,))
-                course.degrees = {Degree[degree_name.upper()] for (degree_name,) in cursor.fetchall()}
-            for course in courses:
-                cursor.execute("SELECT degree_name FROM mandatory_courses "
-                               "WHERE parent_course_number = ?;",
-                               (course.parent_course_number,))
-                course.mandatory_degrees = {Degree[degree_name.upper()] for (degree_name,) in cursor.fetchall()}
+                       in cursor}
+            cursor.execute("SELECT DISTINCT semesters_courses.course_id, semesters.name FROM semesters "
+                           "INNER JOIN semesters_courses "
+                           "INNER JOIN degrees_courses "
+                           "ON semesters.id = semesters_courses.semester_id "
+                           "AND semesters_courses.course_id = degrees_courses.parent_course_number "
+                           f"WHERE degrees_courses.degree_name in {degrees_text};",
+                           (*[degree.name for degree in degrees],))
+            courses_semesters = defaultdict(set)
+            for parent_course_number, semester_name in cursor:
+                courses_semesters[parent_course_number].add(SEMESTERS_BY_NAME[semester_name.upper()])
+
+            cursor.execute("SELECT parent_course_number, degree_name FROM degrees_courses;")
+            courses_degrees = defaultdict(set)
+            for parent_course_number, degree_name in cursor:
+                courses_degrees[parent_course_number].add(DEGREES_BY_NAME[degree_name.upper()])
+
+            cursor.execute("SELECT parent_course_number, degree_name FROM mandatory_courses;")
+            courses_mandatory_degrees = defaultdict(set)
+            for parent_course_number, degree_name in cursor:
+                courses_mandatory_degrees[parent_course_number].add(DEGREES_BY_NAME[degree_name.upper()])
+
             for course in courses:
+                course.semesters = set(courses_semesters.get(course.parent_course_number, ()))
+                course.degrees = set(courses_degrees.get(course.parent_course_number, ()))
+                course.mandatory_degrees = set(courses_mandatory_degrees.get(course.parent_course_number, ()))
                 course.is_active = course.course_number in courses_numbers_active or course.is_active
             return list(courses)
 
@@ -372,7 +569,7 @@ class Database:
                             degrees: Collection[Degree] = None) -> List[Course]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             campus_id = self.load_campus_id(campus_name)
             degrees = degrees or Degree.get_defaults()
             degrees_text = f"({', '.join(['?'] * len(degrees))})"
@@ -386,7 +583,10 @@ class Database:
                            f"AND degrees_courses.degree_name in {degrees_text};",
                            (campus_id, language.short_name(), *[degree.name for degree in degrees]))
 
-            courses = [Course(*data_line) for data_line in cursor.fetchall()]
+            courses = [Course(name, course_number, parent_course_number,
+                              is_active=bool(is_active), credits_count=credits_count)
+                       for name, course_number, parent_course_number, unused_language, is_active, credits_count
+                       in cursor]
             return courses
 
     def load_activities_by_parent_courses_numbers(self, parent_courses_numbers: Set[int],
@@ -395,11 +595,12 @@ class Database:
                                                   settings: Settings = None) -> List[AcademicActivity]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             campus_id = self.load_campus_id(campus_name)
             degrees = degrees or Degree.get_defaults()
             degrees_text = f"({', '.join(['?'] * len(degrees))})"
             parent_courses_numbers_text = f"({', '.join(['?'] * len(parent_courses_numbers))})"
+            cursor.row_factory = academic_activity_row_factory
             cursor.execute("SELECT DISTINCT activities.* FROM activities "
                            "INNER JOIN degrees_courses "
                            "ON activities.parent_course_number = degrees_courses.parent_course_number "
@@ -408,19 +609,15 @@ class Database:
                            f"AND activities.parent_course_number in {parent_courses_numbers_text};",
                            (campus_id, language.short_name(), *[degree.name for degree in degrees],
                             *parent_courses_numbers))
-            activities = [AcademicActivity(*data_line) for *data_line, _campus_id, _language_value in cursor.fetchall()]
+            activities = list(cursor)
 
             if settings and not settings.show_english_speaker_courses:
                 regex = re.compile(rf"^\d+\.({'|'.join(self.english_groups)})\..*$")
                 activities = list(filter(lambda activity_obj: not regex.search(activity_obj.activity_id), activities))
 
+            meetings = self._load_meetings(cursor, [activity.activity_id for activity in activities], language)
             for activity in activities:
-                cursor.execute("SELECT * FROM meetings "
-                               "WHERE activity_id = ? AND "
-                               "language_value = ?;",
-                               (activity.activity_id, language.short_name()))
-                meetings = [Meeting(*data_line) for _activity_id, *data_line, _language_value in cursor.fetchall()]
-                activity.meetings = meetings
+                activity.meetings = meetings.get(activity.activity_id, [])
             return activities
 
     def load_activities_by_courses_choices(self, courses_choices: Dict[str, CourseChoice],
@@ -428,13 +625,13 @@ class Database:
                                            activities_ids: List[str] = None) -> List[AcademicActivity]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             campus_id = self.load_campus_id(campus_name)
             activities_result = []
             activities_ids = activities_ids or []
             lecture_types = [Type.LECTURE, Type.SEMINAR]
             practice_types = [Type.PRACTICE, Type.LAB]
-            activities_ids_text = f"activities.activity.id IN ({', '.join(['?'] * len(activities_ids))})" \
+            activities_ids_text = f"activities.activity_id IN ({', '.join(['?'] * len(activities_ids))})" \
                 if activities_ids else "1"
             for course_name, course_choice in courses_choices.items():
                 lectures = course_choice.available_teachers_for_lecture
@@ -447,6 +644,7 @@ class Database:
 
                 text_hold_place_practices = f"lecturer_name IN ({hold_place_practices})" if practices else is_not_null
 
+                cursor.row_factory = academic_activity_row_factory
                 cursor.execute("SELECT * FROM activities "
                                f"WHERE name = ? AND {activities_ids_text} AND language_value = ? AND campus_id = ? AND "
                                f"((activity_type in (?, ?) AND {text_hold_place_lectures}) "
@@ -456,97 +654,131 @@ class Database:
                                 *lecture_types, *lectures,
                                 *practice_types, *practices))
 
-                activities = [AcademicActivity(*data_line) for *data_line, _campus_id, _language in cursor.fetchall()]
+                activities = list(cursor)
 
                 for activity in activities:
                     if activity.type.is_lecture():
                         activity.attendance_required = course_choice.attendance_required_for_lecture
                     else:
                         activity.attendance_required = course_choice.attendance_required_for_practice
-                    cursor.execute("SELECT * FROM meetings "
-                                   "WHERE activity_id = ? AND language_value = ?;",
-                                   (activity.activity_id, language.short_name()))
-                    meetings = [Meeting(*data_line) for _activity_id, *data_line, _language_value in cursor.fetchall()]
-                    activity.meetings = meetings
 
                 activities_result.extend(activities)
+
+            meetings = self._load_meetings(cursor, [activity.activity_id for activity in activities_result], language)
+            for activity in activities_result:
+                activity.meetings = meetings.get(activity.activity_id, [])
         return activities_result
 
     def save_academic_activities(self, activities: List[AcademicActivity], campus_name: str, language: Language):
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            campus_id = self.load_campus_id(campus_name)
-            for activity in activities:
-                cursor.execute("INSERT OR IGNORE INTO lecturers VALUES (?);", (activity.lecturer_name,))
-                cursor.execute("INSERT OR IGNORE INTO activities VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
-                               (*activity, campus_id, language.short_name()))
-                cursor.execute("INSERT OR IGNORE INTO courses_lecturers VALUES (?, ?, ?, ?, ?, ?);",
-                               (activity.course_number, activity.parent_course_number, activity.lecturer_name,
-                                activity.type.is_lecture(), campus_id, language.short_name()))
-                for meeting in activity.meetings:
-                    cursor.execute("INSERT OR IGNORE INTO meetings VALUES (?, ?, ?, ?, ?);",
-                                   (activity.activity_id, *meeting, language.short_name()))
+        campus_id = self.load_campus_id(campus_name)
+        language_value = language.short_name()
+        # Many activities share the same lecturer, course lecturer and meeting rows, dicts are used instead of sets
+        # to remove the duplicates and still insert in the activities order.
+        lecturers_rows = {}
+        activities_rows = []
+        courses_lecturers_rows = {}
+        meetings_rows = {}
+        for activity in activities:
+            lecturers_rows[(activity.lecturer_name,)] = None
+            activities_rows.append((*activity, campus_id, language_value))
+            courses_lecturers_rows[(activity.course_number, activity.parent_course_number, activity.lecturer_name,
+                                    activity.type.is_lecture(), campus_id, language_value)] = None
+            meetings_rows.update(dict.fromkeys((activity.activity_id, *meeting, language_value)
+                                               for meeting in activity.meetings))
+
+        # Big batches are inserted first into an in memory database without indexes,
+        # then every table is copied into the main database with one statement.
+        is_staged = len(activities_rows) > self.STAGING_ACTIVITIES_THRESHOLD
+        schema = "stage" if is_staged else "main"
+        tables_names = ["lecturers", "activities", "courses_lecturers", "meetings"]
+
+        with self.connect(self.shared_database_path) as (connection, cursor):
+            if is_staged:
+                cursor.execute("ATTACH DATABASE ':memory:' AS stage;")
+            try:
+                if is_staged:
+                    for table_name in tables_names:
+                        cursor.execute(f"CREATE TABLE stage.{table_name} AS SELECT * FROM main.{table_name} WHERE 0;")
+                with self._transaction(connection):
+                    cursor.executemany(f"INSERT OR IGNORE INTO {schema}.lecturers VALUES (?);", lecturers_rows)
+                    cursor.executemany(f"INSERT OR IGNORE INTO {schema}.activities "
+                                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);", activities_rows)
+                    cursor.executemany(f"INSERT OR IGNORE INTO {schema}.courses_lecturers "
+                                       "VALUES (?, ?, ?, ?, ?, ?);", courses_lecturers_rows)
+                    cursor.executemany(f"INSERT OR IGNORE INTO {schema}.meetings VALUES (?, ?, ?, ?, ?);",
+                                       meetings_rows)
+                    if is_staged:
+                        for table_name in tables_names:
+                            cursor.execute(f"INSERT OR IGNORE INTO main.{table_name} SELECT * FROM stage.{table_name};")
+            finally:
+                if is_staged:
+                    cursor.execute("DETACH DATABASE stage;")
 
     def load_academic_activities(self, campus_name: str, language: Language,
                                  courses: List[Course], activities_ids: List[str] = None) -> List[AcademicActivity]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             activities_ids = activities_ids or []
             activities_ids_text = f"activities.activity_id IN ({', '.join(['?'] * len(activities_ids))})" \
                 if activities_ids else "1"
             campus_id = self.load_campus_id(campus_name)
-            courses_parent_numbers = [str(course.parent_course_number) for course in courses]
+            courses_parent_numbers = [course.parent_course_number for course in courses]
+            courses_parent_numbers_text = f"({', '.join(['?'] * len(courses_parent_numbers))})"
+            cursor.row_factory = academic_activity_row_factory
             cursor.execute("SELECT * FROM activities "
                            "WHERE campus_id = ? AND language_value = ? AND "
-                           f"parent_course_number IN ({','.join(courses_parent_numbers)}) "
+                           f"parent_course_number IN {courses_parent_numbers_text} "
                            f"AND {activities_ids_text} ;",
-                           (campus_id, language.short_name(), *activities_ids))
+                           (campus_id, language.short_name(), *courses_parent_numbers, *activities_ids))
 
-            activities = [AcademicActivity(*data_line) for *data_line, _campus_id, _language in cursor.fetchall()]
+            activities = list(cursor)
 
+            meetings = self._load_meetings(cursor, [activity.activity_id for activity in activities], language)
             for activity in activities:
-                cursor.execute("SELECT * FROM meetings "
-                               "WHERE activity_id = ? AND "
-                               "language_value = ?;",
-                               (activity.activity_id, language.short_name()))
-                meetings = [Meeting(*data_line) for _activity_id, *data_line, _language_value in cursor.fetchall()]
-                activity.meetings = meetings
+                activity.meetings = meetings.get(activity.activity_id, [])
             return activities
 
     def save_campuses(self, campuses: Dict[int, Tuple[EnglishName, HebrewName]]):
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            for campus_id, (english_name, hebrew_name) in campuses.items():
-                cursor.execute("INSERT OR IGNORE INTO campuses VALUES (?, ?, ?);",
-                               (campus_id, english_name, hebrew_name))
+        with self.connect(self.shared_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.executemany("INSERT OR IGNORE INTO campuses VALUES (?, ?, ?);",
+                                   [(campus_id, english_name, hebrew_name)
+                                    for campus_id, (english_name, hebrew_name) in campuses.items()])
 
     def load_campus_names(self, language: Language = None) -> List[str]:
+        return self._load_campus_names(language or Language.get_current())
+
+    @cache_shared_result
+    def _load_campus_names(self, language: Language) -> List[str]:
         if not self.shared_database_path.exists():
             return []
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
-            language = language or Language.get_current()
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             name_column = "english_name" if language is Language.ENGLISH else "hebrew_name"
             try:
                 cursor.execute(f"SELECT {name_column} FROM campuses;")
             except OperationalError:
                 return []
-            campus_names = [name[0] for name in cursor.fetchall()]
+            campus_names = self._scalar_rows(cursor)
             return campus_names
 
+    @cache_shared_result
     def load_campuses(self) -> Dict[int, Tuple[EnglishName, HebrewName]]:
         if not self.shared_database_path.exists():
             return {}
-        with self.connect(self.shared_database_path) as (unused_connection, cursor):
+        with self.connect(self.shared_database_path, is_file_checked=True) as (unused_connection, cursor):
             cursor.execute("SELECT * FROM campuses;")
             campuses = {campus_id: (english_name, hebrew_name)
-                        for campus_id, english_name, hebrew_name in cursor.fetchall()}
+                        for campus_id, english_name, hebrew_name in cursor}
         return campuses
 
     def load_current_versions(self) -> Tuple[Optional[str], Optional[str]]:
-        if not self.versions_path.is_file():
+        try:
+            with open(self.versions_path, "r", encoding=utils.ENCODING) as file:
+                software_version, database_version = file.readlines()
+                return software_version.strip(), database_version.strip()
+        except FileNotFoundError:
             return None, None
-        with open(self.versions_path, "r", encoding=utils.ENCODING) as file:
-            software_version, database_version = file.readlines()
-            return software_version.strip(), database_version.strip()
 
     def save_current_versions(self, software_version: str, database_version: str):
         with open(self.versions_path, "w", encoding=utils.ENCODING) as file:
@@ -566,10 +798,11 @@ class Database:
             file.write("\n".join(courses_names))
 
     def load_courses_console_choose(self) -> Optional[List[str]]:
-        if not self.courses_choose_path.is_file():
+        try:
+            with open(self.courses_choose_path, "r", encoding=utils.ENCODING) as file:
+                return [text.replace("\n", "") for text in file.readlines()]
+        except FileNotFoundError:
             return None
-        with open(self.courses_choose_path, "r", encoding=utils.ENCODING) as file:
-            return [text.replace("\n", "") for text in file.readlines()]
 
     def load_user_data(self) -> Optional[User]:
         """
@@ -580,10 +813,11 @@ class Database:
         password
         :return: The user data or None if not found.
         """
-        if not self.user_name_file_path.exists():
+        try:
+            with open(self.user_name_file_path, "r", encoding=utils.ENCODING) as file:
+                return User(file.readline().strip(), file.readline().strip())
+        except FileNotFoundError:
             return None
-        with open(self.user_name_file_path, "r", encoding=utils.ENCODING) as file:
-            return User(file.readline().strip(), file.readline().strip())
 
     def clear_versions(self):
         self.versions_path.unlink(missing_ok=True)
@@ -597,6 +831,8 @@ class Database:
         self.clear_versions()
 
     def clear_all_personal_folders(self):
+        self.clear_results_cache()
+        self.close_connections()
         all_folders = [path for path in utils.get_database_path().iterdir() if path.is_dir()]
         for folder in all_folders:
             shutil.rmtree(folder, ignore_errors=True)
@@ -606,11 +842,12 @@ class Database:
             file.write(settings.to_json(indent=4, ensure_ascii=False, sort_keys=False))
 
     def load_settings(self) -> Optional[Settings]:
-        if not self.settings_file_path.exists():
+        try:
+            with open(self.settings_file_path, "r", encoding=utils.ENCODING) as file:
+                # pylint: disable=no-member
+                return Settings.from_json(file.read())
+        except FileNotFoundError:
             return None
-        with open(self.settings_file_path, "r", encoding=utils.ENCODING) as file:
-            # pylint: disable=no-member
-            return Settings.from_json(file.read())
 
     def clear_settings(self):
         self.settings_file_path.unlink(missing_ok=True)
@@ -640,11 +877,12 @@ class Database:
             file.write(json.dumps(years))
 
     def load_years(self):
-        if not self.years_file_path.exists():
+        try:
+            with open(self.years_file_path, "r", encoding=utils.ENCODING) as file:
+                data = json.loads(file.read())
+        except FileNotFoundError:
             return {}
-        with open(self.years_file_path, "r", encoding=utils.ENCODING) as file:
-            data = json.loads(file.read())
-            return {int(key): value for key, value in data.items()}
+        return {int(key): value for key, value in data.items()}
 
     def clear_years(self):
         self.years_file_path.unlink(missing_ok=True)
@@ -657,17 +895,19 @@ class Database:
     def update_database(self, database_path: Path):
         self.clear_shared_database()
         self.init_database_tables()
+        self.close_connections(self.shared_database_path)
         shutil.copy2(database_path, self.shared_database_path)
+        # Add the indexes in case the new database was created before they existed.
+        self.init_shared_database_tables()
 
     def _are_tables_exists(self, tables_names: List[str], database_path: Path):
         if not database_path.exists():
             return False
-        with self.connect(database_path) as (unused_connection, cursor):
-            all_exists = True
-            for table_name in tables_names:
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name= ?;", (table_name,))
-                all_exists = all_exists and bool(cursor.fetchone())
-        return all_exists
+        with self.connect(database_path, is_file_checked=True) as (unused_connection, cursor):
+            tables_names_text = f"({', '.join(['?'] * len(tables_names))})"
+            cursor.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name IN {tables_names_text};",
+                           (*tables_names,))
+            return cursor.fetchone()[0] == len(set(tables_names))
 
     def are_shared_tables_exists(self):
         return self._are_tables_exists(self._shared_sql_tables, self.shared_database_path)
@@ -676,11 +916,13 @@ class Database:
         return self._are_tables_exists(self._personal_sql_tables, self.personal_database_path)
 
     def _clear_database(self, tables_names: List[str], database_path: Path):
+        self.clear_results_cache()
         if not database_path.exists():
             return
-        with self.connect(database_path) as (unused_connection, cursor):
-            for table_name in tables_names:
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name};")
+        drop_tables = "".join(f"DROP TABLE IF EXISTS {table_name};" for table_name in tables_names)
+        with self.connect(database_path, is_file_checked=True) as (unused_connection, cursor):
+            cursor.executescript(f"BEGIN;{drop_tables}COMMIT;")
+        self.close_connections(database_path)
 
     def clear_shared_database(self):
         self._clear_database(self._shared_sql_tables, self.shared_database_path)
@@ -692,20 +934,20 @@ class Database:
         self.courses_choose_path.unlink(missing_ok=True)
 
     def save_courses_already_done(self, courses: Set[Course]):
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
-            for course in courses:
-                cursor.execute("INSERT OR IGNORE INTO courses_already_done (parent_course_number) VALUES (?);",
-                               (course.parent_course_number,))
+        with self.connect(self.personal_database_path) as (connection, cursor):
+            with self._transaction(connection):
+                cursor.executemany("INSERT OR IGNORE INTO courses_already_done (parent_course_number) VALUES (?);",
+                                   [(course.parent_course_number,) for course in courses])
 
     def load_courses_already_done(self, language: Language) -> Set[Course]:
         if not self.personal_database_path.exists():
             return set()
-        with self.connect(self.personal_database_path) as (unused_connection, cursor):
+        with self.connect(self.personal_database_path, is_file_checked=True) as (unused_connection, cursor):
             try:
                 cursor.execute("SELECT * FROM courses_already_done;")
             except OperationalError:
                 return set()
-            parent_courses_numbers = {parent_course_number for (parent_course_number,) in cursor.fetchall()}
+            parent_courses_numbers = set(self._scalar_rows(cursor))
         if not parent_courses_numbers:
             return set()
         with self.connect(self.shared_database_path) as (unused_connection, cursor):
@@ -713,7 +955,10 @@ class Database:
                            "WHERE language_value = ? "
                            "AND parent_course_number IN (" + ", ".join(["?"] * len(parent_courses_numbers)) + ");",
                            (language.short_name(), *parent_courses_numbers))
-            courses = {Course(*course_data) for *course_data, _language_value in cursor.fetchall()}
+            courses = {Course(name, course_number, parent_course_number,
+                              is_active=bool(is_active), credits_count=credits_count)
+                       for name, course_number, parent_course_number, unused_language, is_active, credits_count
+                       in cursor}
         return courses
 
     def clear_courses_already_done(self):
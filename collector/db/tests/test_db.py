@@ -1,5 +1,5 @@
 import pathlib
-from sqlite3 import IntegrityError
+from sqlite3 import IntegrityError, OperationalError, ProgrammingError
 
 import pytest
 from pytest import fixture
@@ -29,6 +29,33 @@ class TestDatabase:
     def test_not_empty(self, database_mock):
         assert database_mock.are_shared_tables_exists()
 
+    def test_connection_pragmas(self, database_mock):
+        with database_mock.connect(database_mock.shared_database_path) as (unused_connection, cursor):
+            cursor.execute("PRAGMA journal_mode;")
+            assert cursor.fetchone()[0] == "delete"
+            cursor.execute("PRAGMA temp_store;")
+            assert cursor.fetchone()[0] == 2
+        with database_mock.connect(database_mock.personal_database_path) as (unused_connection, cursor):
+            cursor.execute("PRAGMA journal_mode;")
+            assert cursor.fetchone()[0] == "wal"
+
+    def test_connection_pool(self, database_mock):
+        with database_mock.connect(database_mock.shared_database_path) as (connection, unused_cursor):
+            with database_mock.connect(database_mock.shared_database_path) as (inner_connection, unused_cursor):
+                assert inner_connection is not connection
+        with database_mock.connect(database_mock.shared_database_path) as (reused_connection, unused_cursor):
+            assert reused_connection in (connection, inner_connection)
+        database_mock.close_connections(database_mock.personal_database_path)
+        with database_mock.connect(database_mock.shared_database_path) as (reused_connection, unused_cursor):
+            assert reused_connection in (connection, inner_connection)
+        database_mock.close_connections()
+        with database_mock.connect(database_mock.shared_database_path) as (new_connection, unused_cursor):
+            assert new_connection not in (connection, inner_connection)
+        shared_database_path = database_mock.shared_database_path
+        other_spelling_path = shared_database_path.parent / ".." / shared_database_path.parent.name / "database.db"
+        with database_mock.connect(other_spelling_path) as (other_spelling_connection, unused_cursor):
+            assert other_spelling_connection is new_connection
+
     def test_load_current_versions(self, database_mock):
         assert database_mock.load_current_versions() == (None, None)
         database_mock.save_current_versions("1.0", "2.0.0")
@@ -36,6 +63,7 @@ class TestDatabase:
 
     def test_not_exists(self, database_mock):
         database_mock.clear_all_data()
+        database_mock.close_connections()
         database_mock.shared_database_path.unlink(missing_ok=True)
         assert database_mock.get_common_campuses_names()
         assert not database_mock.load_semesters()
@@ -67,6 +95,23 @@ class TestDatabase:
         assert database_mock.load_campuses() == campuses
         assert database_mock.load_campus_names(Language.HEBREW) == ["א", "ב", "ג"]
         assert database_mock.load_campus_names(Language.ENGLISH) == ["A", "B", "C"]
+        assert database_mock.load_campus_id("B") == 2
+        assert database_mock.load_campus_id("ב") == 2
+        other_database = type(database_mock)()
+        assert other_database.load_campus_id("B") == 2
+        database_mock.clear_shared_database()
+        database_mock.init_database_tables()
+        database_mock.save_campuses({4: ("B", "ב")})
+        assert database_mock.load_campus_id("ב") == 4
+        assert other_database.load_campus_id("B") == 4
+
+    def test_results_cache(self, database_mock, campuses):
+        campus_names = database_mock.load_campus_names(Language.ENGLISH)
+        campus_names.append("D")
+        assert database_mock.load_campus_names(Language.ENGLISH) == ["A", "B", "C"]
+        database_mock.save_campuses({4: ("D", "ד")})
+        assert database_mock.load_campus_names(Language.ENGLISH) == ["A", "B", "C", "D"]
+        assert database_mock.load_campus_names(Language.HEBREW) == ["א", "ב", "ג", "ד"]
 
     def test_language(self, database_mock):
         assert not database_mock.get_language()
@@ -98,6 +143,7 @@ class TestDatabase:
         assert not database_mock.load_degrees()
         database_mock.update_database(pathlib.Path(new_database_path))
         assert database_mock.load_degrees()
+        database_mock.close_connections(new_database_path)
         new_database_path.unlink(missing_ok=True)
 
     def test_load_activities_by_parent_courses_numbers(self, database_mock, campuses):
@@ -150,6 +196,7 @@ class TestDatabase:
         assert set(database_mock.load_courses(Language.ENGLISH)) == {course1, course2}
         database_mock.save_courses_already_done({course1})
         assert database_mock.load_courses_already_done(Language.ENGLISH) == {course1}
+        assert [course.semesters for course in database_mock.load_courses_already_done(Language.ENGLISH)] == [set()]
         database_mock.clear_courses_already_done()
         assert not database_mock.load_courses_already_done(Language.ENGLISH)
 
@@ -160,6 +207,7 @@ class TestDatabase:
         database_mock.save_courses([course1, course2], Language.ENGLISH)
         database_mock.save_academic_activities([activity], "A", Language.ENGLISH)
         assert database_mock.load_courses_active_numbers() == {1234}
+        database_mock.close_connections(database_mock.shared_database_path)
         database_mock.shared_database_path.unlink()
         assert not database_mock.load_courses_active_numbers()
 
@@ -193,6 +241,14 @@ class TestDatabase:
         with pytest.raises(IntegrityError):
             database_mock.save_personal_activities([activity])
 
+    def test_save_rollback_on_error(self, database_mock):
+        activity = Activity("my activity")
+        activity.add_slot(Meeting(Day.MONDAY, "10:00", "12:00"))
+        other_activity = Activity("other activity")
+        with pytest.raises(IntegrityError):
+            database_mock.save_personal_activities([other_activity, activity, activity])
+        assert not database_mock.load_personal_activities()
+
     def test_activities(self, database_mock, campuses):
         campus_name = "A"
         academic_activity = AcademicActivity("name", Type.LECTURE, True, "meir", 12, 232, "", "12.23", "", 0, 100, 1213)
@@ -203,6 +259,27 @@ class TestDatabase:
         assert loaded == [academic_activity]
         assert loaded[0].meetings == [Meeting(Day.MONDAY, "10:00", "12:00")]
 
+    def test_activities_staged_save(self, database_mock, campuses):
+        campus_name = "A"
+        database_mock.STAGING_ACTIVITIES_THRESHOLD = 0
+        activities = [AcademicActivity("name", Type.LECTURE, True, "meir", 12, 232, "", f"12.2{i}", "", 0, 100, 1213)
+                      for i in range(3)]
+        for activity in activities:
+            activity.add_slot(Meeting(Day.MONDAY, "10:00", "12:00"))
+        database_mock.save_academic_activities(activities, campus_name, Language.ENGLISH)
+        database_mock.save_academic_activities(activities, campus_name, Language.ENGLISH)
+        loaded = database_mock.load_academic_activities(campus_name, Language.ENGLISH,
+                                                        [Course("name", 12, 232, set(Semester), set(Degree))])
+        assert loaded == activities
+        assert all(activity.meetings == [Meeting(Day.MONDAY, "10:00", "12:00")] for activity in loaded)
+
+        with database_mock.connect(database_mock.shared_database_path) as (unused_connection, cursor):
+            cursor.execute("DROP TABLE meetings;")
+        with pytest.raises(OperationalError):
+            database_mock.save_academic_activities(activities, campus_name, Language.ENGLISH)
+        database_mock.init_shared_database_tables()
+        database_mock.save_academic_activities(activities, campus_name, Language.ENGLISH)
+
     def test_activities_can_enroll_in(self, database_mock):
         all_activities_can_enroll_in = {
             "12.1.1": {103},
@@ -215,10 +292,14 @@ class TestDatabase:
         assert len(loaded_activities_ids) == 2
         assert loaded_activities_ids["12.1.1"] == {103}
         assert loaded_activities_ids["10.10.1"] == {103, 104}
+        with pytest.raises(ProgrammingError):
+            database_mock.save_activities_ids_groups_can_enroll_in({"12.1.1": {object()}})
+        assert database_mock.load_activities_ids_groups_can_enroll_in() == all_activities_can_enroll_in
 
     def test_mandatory_degrees(self, database_mock):
-        course = Course("course", 10, 20, Semester.FALL,
-                        {Degree.SOFTWARE_ENGINEERING, Degree.COMPUTER_SCIENCE}, Degree.COMPUTER_SCIENCE)
+        course = Course.from_single_semester("course", 10, 20, Semester.FALL,
+                                             degrees={Degree.SOFTWARE_ENGINEERING, Degree.COMPUTER_SCIENCE},
+                                             mandatory_degrees=Degree.COMPUTER_SCIENCE)
         database_mock.save_courses([course], Language.ENGLISH)
         courses = database_mock.load_courses(Language.ENGLISH, {Degree.SOFTWARE_ENGINEERING})
         assert len(courses) == 1, "ERROR: Entered one course."
@@ -254,6 +335,10 @@ class TestDatabase:
         database_mock.save_academic_activities(activities, campus_name, language)
         loaded_choices = database_mock.load_activities_by_courses_choices(courses_choices, campus_name, language)
         assert loaded_choices == [create_activity(5)]
+        loaded_choices = database_mock.load_activities_by_courses_choices(courses_choices, campus_name, language,
+                                                                          ["12.235"])
+        assert loaded_choices == [create_activity(5)]
+        assert not database_mock.load_activities_by_courses_choices(courses_choices, campus_name, language, ["12.231"])
 
     def test_user_data(self, database_mock):
         user = User("username", "password")
@@ -326,6 +411,7 @@ class TestDatabase:
 
     def test_clear_all(self, database_mock):
         database_mock.clear_all_data()
+        database_mock.close_connections()
         database_mock.shared_database_path.unlink(missing_ok=True)
         database_mock.personal_database_path.unlink(missing_ok=True)
 
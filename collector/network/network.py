@@ -448,14 +448,14 @@ class NetworkHttp:
                             if (not is_current_year and course_number in courses) or should_skip:
                                 continue
                             semester = Semester(course["semesterID"])
-                            course_data = Course(name, course_number, parent_course_id, semesters=semester)
+                            course_data = Course.from_single_semester(name, course_number, parent_course_id, semester)
                             course_data.add_degrees(degree)
                             is_mandatory = course["mandatory"]
                             if is_mandatory:
                                 course_data.add_mandatory(degree)
                             if course_number in courses:
                                 course_data = courses[course_number]
-                                course_data.add_semesters(semester)
+                                course_data.add_semester(semester)
                                 course_data.add_degrees(degree)
                                 if is_mandatory:
                                     course_data.add_mandatory(degree)
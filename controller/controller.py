@@ -210,7 +210,7 @@ class Controller:
                     course_choice = courses_choices[course.name]
                     if ask_attendance:
                         course.attendance_required_for_lecture = course_choice.attendance_required_for_lecture
-                        course.attendance_required_for_exercise = course_choice.attendance_required_for_practice
+                        course.attendance_required_for_practice = course_choice.attendance_required_for_practice
                     user_courses.append(course)
 
             activities = self.database.load_activities_by_courses_choices(courses_choices, campus_name, language)
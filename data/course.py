@@ -1,25 +1,40 @@
-from typing import Union, Set
+import sys
+from typing import Union, Set, Optional, FrozenSet
 
 from data.degree import Degree
 from data.semester import Semester
 from data.type import Type
 
+# Shared by all the courses created without semesters, replaced by a set on the first added semester.
+_EMPTY_SEMESTERS: FrozenSet[Semester] = frozenset()
+
+_LECTURE_ATTENDANCE_INDEX = 0
+_PRACTICE_ATTENDANCE_INDEX = 1
+# Lectures and seminars share one attendance flag, labs and practices share the other.
+_ATTENDANCE_INDEXES = {
+    Type.LECTURE: _LECTURE_ATTENDANCE_INDEX,
+    Type.SEMINAR: _LECTURE_ATTENDANCE_INDEX,
+    Type.LAB: _PRACTICE_ATTENDANCE_INDEX,
+    Type.PRACTICE: _PRACTICE_ATTENDANCE_INDEX,
+}
+
 
 class Course:
+    __slots__ = ("_key", "_hash", "_attendance", "semesters", "degrees", "mandatory_degrees", "is_active",
+                 "credits_count")
 
     def __init__(self, name: str, course_number: int, parent_course_number: int,
-                 semesters: Union[Semester, Set[Semester], None] = None,
+                 semesters: Optional[Set[Semester]] = None,
                  degrees: Union[Degree, Set[Degree], None] = None,
                  mandatory_degrees: Union[Degree, Set[Degree], None] = None,
                  is_active: bool = False, credits_count: float = 0):
-        self.name = name
-        self.course_number = course_number
-        self.parent_course_number = parent_course_number
-        self.attendance_required_for_lecture = True
-        self.attendance_required_for_practice = True
-        if isinstance(semesters, Semester):
-            semesters = {semesters}
-        self.semesters = semesters or set()
+        # Names repeat across many courses, interning them lets equality checks compare pointers.
+        name = sys.intern(name) if isinstance(name, str) else name
+        # The name and course numbers identify the course, they are read only so the cached hash stays valid.
+        self._key = (name, course_number, parent_course_number)
+        self._hash = hash(self._key)
+        self._attendance = bytearray(b"\x01\x01")
+        self.semesters = semesters or _EMPTY_SEMESTERS
 
         if isinstance(degrees, Degree):
             degrees = {degrees}
@@ -32,9 +47,37 @@ class Course:
         self.is_active = is_active
         self.credits_count = credits_count
 
-    def add_semesters(self, semesters: Union[Semester, Set[Semester]]):
-        if isinstance(semesters, Semester):
-            semesters = {semesters}
+    @property
+    def name(self) -> str:
+        return self._key[0]
+
+    @property
+    def course_number(self) -> int:
+        return self._key[1]
+
+    @property
+    def parent_course_number(self) -> int:
+        return self._key[2]
+
+    @classmethod
+    def from_single_semester(cls, name: str, course_number: int, parent_course_number: int, semester: Semester,
+                             **kwargs) -> "Course":
+        return cls(name, course_number, parent_course_number, {semester}, **kwargs)
+
+    @classmethod
+    def from_semester_set(cls, name: str, course_number: int, parent_course_number: int, semesters: Set[Semester],
+                          **kwargs) -> "Course":
+        return cls(name, course_number, parent_course_number, semesters, **kwargs)
+
+    def add_semester(self, semester: Semester):
+        # Copies and pickles of the shared empty frozenset are different objects, so check the type.
+        if not isinstance(self.semesters, set):
+            self.semesters = set(self.semesters)
+        self.semesters.add(semester)
+
+    def add_semesters_set(self, semesters: Set[Semester]):
+        if not isinstance(self.semesters, set):
+            self.semesters = set(self.semesters)
         self.semesters.update(semesters)
 
     def add_degrees(self, degrees: Union[Degree, Set[Degree]]):
@@ -52,19 +95,40 @@ class Course:
         return self.degrees - self.mandatory_degrees
 
     def __eq__(self, other):
-        is_equals = self.name == other.name
-        is_equals = is_equals and self.course_number == other.course_number
-        is_equals = is_equals and self.parent_course_number == other.parent_course_number
-        return is_equals
+        if self is other:
+            return True
+        if not isinstance(other, Course):
+            return NotImplemented
+        name, course_number, parent_course_number = self._key
+        other_name, other_course_number, other_parent_course_number = other._key
+        # Compare the numbers first, they distinguish courses far more cheaply than the names.
+        return course_number == other_course_number and \
+            parent_course_number == other_parent_course_number and \
+            name == other_name
 
     def __hash__(self):
-        return hash((self.name, self.course_number, self.parent_course_number))
+        return self._hash
+
+    @property
+    def attendance_required_for_lecture(self) -> bool:
+        return bool(self._attendance[_LECTURE_ATTENDANCE_INDEX])
+
+    @attendance_required_for_lecture.setter
+    def attendance_required_for_lecture(self, required: bool):
+        self._attendance[_LECTURE_ATTENDANCE_INDEX] = bool(required)
+
+    @property
+    def attendance_required_for_practice(self) -> bool:
+        return bool(self._attendance[_PRACTICE_ATTENDANCE_INDEX])
+
+    @attendance_required_for_practice.setter
+    def attendance_required_for_practice(self, required: bool):
+        self._attendance[_PRACTICE_ATTENDANCE_INDEX] = bool(required)
 
     def set_attendance_required(self, course_type: Type, required: bool):
-        if course_type.is_lecture():
-            self.attendance_required_for_lecture = required
-        elif course_type.is_exercise():
-            self.attendance_required_for_practice = required
+        index = _ATTENDANCE_INDEXES.get(course_type)
+        if index is not None:
+            self._attendance[index] = bool(required)
 
     def __str__(self):
         return self.name
@@ -73,15 +137,8 @@ class Course:
         return str(self)
 
     def __iter__(self):
-        return iter((self.name, self.course_number, self.parent_course_number))
+        return iter(self._key)
 
     def is_attendance_required(self, course_type: Type):
-        attendance_required = True
-
-        if course_type.is_lecture():
-            attendance_required = self.attendance_required_for_lecture
-
-        elif course_type.is_exercise():
-            attendance_required = self.attendance_required_for_practice
-
-        return attendance_required
+        index = _ATTENDANCE_INDEXES.get(course_type)
+        return True if index is None else bool(self._attendance[index])
@@ -1,6 +1,7 @@
 import os
 import shutil
-from copy import copy
+import pickle
+from copy import copy, deepcopy
 
 import pytest
 
@@ -60,30 +61,63 @@ class TestData:
 
     def test_course(self):
         course = Course("", 0, 0, set(Semester), set(Degree))
-        course2 = Course("", 0, 0, Semester.ANNUAL, Degree.SOFTWARE_ENGINEERING)
+        course2 = Course.from_single_semester("", 0, 0, Semester.ANNUAL, degrees=Degree.SOFTWARE_ENGINEERING)
         assert course == course2
-        course3 = Course("", 0, 0, Semester.ANNUAL, Degree.SOFTWARE_ENGINEERING)
+        assert hash(course) == hash(course2)
+        assert tuple(course2) == ("", 0, 0)
+        assert course != Course("", 1, 0)
+        assert course != ("", 0, 0)
+        assert course not in [None, "", ("", 0, 0), Course("", 0, 1)]
+        assert course in [None, course2]
+        course3 = Course.from_semester_set("", 0, 0, {Semester.ANNUAL}, degrees=Degree.SOFTWARE_ENGINEERING)
         course3.add_degrees(Degree.COMPUTER_SCIENCE)
         course3.add_degrees({Degree.SOFTWARE_ENGINEERING, Degree.COMPUTER_SCIENCE})
         assert len(course3.degrees) == 2
+        assert course2.semesters == course3.semesters == {Semester.ANNUAL}
+        assert Course("".join(["na", "me"]), 0, 0).name is Course("name", 1, 1).name
+
+        course4 = Course("", 0, 0)
+        assert course4.semesters is Course("", 1, 1).semesters
+        course4.add_semester(Semester.FALL)
+        assert course4.semesters == {Semester.FALL}
+        assert not Course("", 1, 1).semesters
+        copied_course = deepcopy(Course("", 1, 1))
+        copied_course.add_semesters_set({Semester.FALL})
+        assert copied_course.semesters == {Semester.FALL}
+        unpickled_course = pickle.loads(pickle.dumps(Course("", 1, 1)))
+        unpickled_course.add_semester(Semester.FALL)
+        assert unpickled_course.semesters == {Semester.FALL}
+        assert unpickled_course == Course("", 1, 1)
 
         course.set_attendance_required(Type.LAB, True)
         course.set_attendance_required(Type.LECTURE, False)
         assert course.is_attendance_required(Type.LAB)
         assert not course.is_attendance_required(Type.LECTURE)
-
-        course.name = "name"
-        assert repr(course) == "name"
+        assert not course.is_attendance_required(Type.SEMINAR)
+        assert not course.attendance_required_for_lecture
+        assert course.is_attendance_required(Type.PERSONAL)
+        course.attendance_required_for_practice = False
+        assert not course.is_attendance_required(Type.PRACTICE)
+        course.set_attendance_required(Type.PRACTICE, True)
+        assert course.attendance_required_for_practice
+
+        with pytest.raises(AttributeError):
+            course.name = "name"
+        assert repr(Course("name", 0, 0)) == "name"
         assert repr(Semester.SUMMER) == "Summer"
         assert repr(Day.MONDAY) == "Monday"
 
-        course.add_semesters({Semester.SUMMER})
-        course.add_semesters(Semester.ANNUAL)
+        course.add_semesters_set({Semester.SUMMER})
+        course.add_semester(Semester.ANNUAL)
         assert course.semesters == {Semester.SUMMER, Semester.ANNUAL, Semester.SPRING, Semester.FALL}
 
         course.add_mandatory(Degree.COMPUTER_SCIENCE)
         assert course.mandatory_degrees == {Degree.COMPUTER_SCIENCE}
 
+        assert not hasattr(course, "__dict__")
+        with pytest.raises(AttributeError):
+            course.attendance_required_for_exercise = False
+
     def test_activity(self):
         activity = Activity("", Type.LAB, False)
         activity.add_slot(Meeting(Day.MONDAY, "09:00", "11:00"))